@@ -2,10 +2,13 @@
 """Agent Sandbox - Interactive container environment with diff generation."""
 
 import json
+import os
 import shutil
+import sys
 import tempfile
 import subprocess
-from datetime import datetime
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import docker
 from rich.console import Console
@@ -22,9 +25,15 @@ class AgentSandbox:
         self.docker_client = docker.from_env()
         self.cwd = Path.cwd()
         self.temp_workspace = None
-        self.sandbox_name = None
-        self.network_name = None
-        self.proxy_container_name = None
+        self.baseline_tree = None
+        self.baseline_time_ns = None
+        self.baseline_ignored = set()
+        # Names are fixed up front so independent setup steps can run concurrently
+        now = time.localtime()
+        timestamp = f"{now.tm_year:04d}{now.tm_mon:02d}{now.tm_mday:02d}-{now.tm_hour:02d}{now.tm_min:02d}{now.tm_sec:02d}"
+        self.sandbox_name = f"sandbox-{timestamp}"
+        self.network_name = f"agent-network-{self.sandbox_name}"
+        self.proxy_container_name = f"proxy-{self.sandbox_name}"
         # Get the agent-sandbox project root (where this script is)
         self.project_root = Path(__file__).parent.parent
         self.live = None
@@ -44,19 +53,130 @@ class AgentSandbox:
         
     def create_workspace_copy(self):
         """Create a temporary copy of the current working directory."""
-        timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
-        self.sandbox_name = f"sandbox-{timestamp}"
-        self.network_name = f"agent-network-{self.sandbox_name}"
-        self.proxy_container_name = f"proxy-{self.sandbox_name}"
-        
         # Create temp directory for workspace
-        self.temp_workspace = Path(tempfile.mkdtemp(prefix=f"agent-sandbox-{timestamp}-"))
+        self.temp_workspace = Path(tempfile.mkdtemp(prefix=f"agent-{self.sandbox_name}-"))
         
         
         # Copy current directory to temp workspace
-        shutil.copytree(self.cwd, self.temp_workspace / "workspace")
+        workspace_path = self.temp_workspace / "workspace"
+        if not self.clone_directory(self.cwd, workspace_path):
+            self.copy_directory(self.cwd, workspace_path)
+        
+        return workspace_path
+    
+    def clone_directory(self, src, dst):
+        """Copy a directory with cp, using copy-on-write clones where the filesystem supports them.
+        
+        Files are never hardlinked, as writes in the sandbox must not reach the original files.
+        Returns False (leaving no partial copy) if cp is unavailable or fails.
+        """
+        if sys.platform == "darwin":
+            # clonefile(2) on APFS
+            cp_cmd = ["cp", "-a", "-c", str(src), str(dst)]
+        elif sys.platform.startswith("linux"):
+            # Reflinks on btrfs/XFS/etc., regular copy elsewhere
+            cp_cmd = ["cp", "-a", "--reflink=auto", str(src), str(dst)]
+        else:
+            return False
+        
+        try:
+            subprocess.run(cp_cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        except (OSError, subprocess.CalledProcessError):
+            shutil.rmtree(dst, ignore_errors=True)
+            return False
+        return True
+    
+    def copy_directory(self, src, dst):
+        """Copy a directory with shutil, copying its top-level entries concurrently."""
+        dst.mkdir()
+        with ThreadPoolExecutor() as executor:
+            futures = []
+            for entry in os.scandir(src):
+                target = dst / entry.name
+                if entry.is_dir(follow_symlinks=False):
+                    futures.append(executor.submit(shutil.copytree, entry.path, target, symlinks=True))
+                else:
+                    futures.append(executor.submit(shutil.copy2, entry.path, target, follow_symlinks=False))
+            for future in futures:
+                future.result()
+        shutil.copystat(src, dst)
+    
+    def baseline_git_env(self):
+        """Environment pointing git at the private index used for the workspace baseline."""
+        return {**os.environ, "GIT_INDEX_FILE": str(self.temp_workspace / "baseline.index")}
+    
+    def snapshot_workspace(self, workspace_path):
+        """Record the starting state of the workspace as a git tree to diff against on exit.
+        
+        A private index outside the workspace is used, so the repository seen in the sandbox is untouched.
+        """
+        env = self.baseline_git_env()
+        try:
+            # Seed the private index from the repository's own, so tracked files matching .gitignore stay tracked
+            result = subprocess.run(["git", "rev-parse", "--git-path", "index"], cwd=str(workspace_path),
+                                    check=True, capture_output=True, text=True)
+            repo_index = workspace_path / result.stdout.strip()
+            if repo_index.exists():
+                shutil.copyfile(repo_index, env["GIT_INDEX_FILE"])
+            
+            # A failed add leaves the private index empty, and write-tree would then return the empty tree
+            subprocess.run(["git", "add", "-A"], cwd=str(workspace_path), env=env, check=True,
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            result = subprocess.run(["git", "write-tree"], cwd=str(workspace_path), env=env,
+                                    check=True, capture_output=True, text=True)
+        except (OSError, subprocess.CalledProcessError):
+            # Not a git repository, git unavailable or files that cannot be staged: diff against HEAD instead
+            return
+        self.baseline_tree = result.stdout.strip() or None
+        
+        if not self.baseline_tree:
+            return
+        
+        # Ignored paths cannot affect the diff, so the modification scan can skip them. This relies on the
+        # private index being seeded above: otherwise tracked files under ignore rules (and whole directories
+        # containing them) would be listed here too, hiding their edits from the scan.
+        try:
+            result = subprocess.run(["git", "ls-files", "-z", "--others", "--ignored", "--exclude-standard", "--directory"],
+                                    cwd=str(workspace_path), env=env, check=True, capture_output=True, text=True)
+        except (OSError, subprocess.CalledProcessError):
+            # Without the ignored paths the scan could walk large trees git never looks at; always run git instead
+            return
+        self.baseline_ignored = {
+            os.path.join(str(workspace_path), path.rstrip("/"))
+            for path in result.stdout.split("\0") if path
+        }
+        
+        # Stamp on the workspace filesystem, so later writes compare against the same clock
+        stamp_file = self.temp_workspace / "baseline.stamp"
+        stamp_file.touch()
+        self.baseline_time_ns = stamp_file.stat().st_mtime_ns
+    
+    def workspace_modified(self, workspace_path):
+        """Check whether any file or directory in the workspace changed after the baseline snapshot.
         
-        return self.temp_workspace / "workspace"
+        Git directories and paths ignored at snapshot time are skipped, as git never compares them.
+        """
+        try:
+            root_stat = os.stat(workspace_path)
+            if max(root_stat.st_mtime_ns, root_stat.st_ctime_ns) >= self.baseline_time_ns:
+                return True
+            
+            pending = [str(workspace_path)]
+            while pending:
+                with os.scandir(pending.pop()) as entries:
+                    for entry in entries:
+                        if entry.name == ".git" or entry.path in self.baseline_ignored:
+                            continue
+                        entry_stat = entry.stat(follow_symlinks=False)
+                        # ctime also catches writes that preserve mtime
+                        if max(entry_stat.st_mtime_ns, entry_stat.st_ctime_ns) >= self.baseline_time_ns:
+                            return True
+                        if entry.is_dir(follow_symlinks=False):
+                            pending.append(entry.path)
+        except OSError:
+            # Unreadable entries (e.g. created by root in the container): let git decide
+            return True
+        return False
     
     def setup_claude_settings(self, workspace_path):
         """Create Claude settings.json with hooks configuration."""
@@ -132,6 +252,10 @@ class AgentSandbox:
         else:
             self.custom_proxy_image_id = None
     
+    def create_credentials_volume(self):
+        """Create persistent volume for Claude Code credentials."""
+        subprocess.run(["docker", "volume", "create", "claude-code-credentials"], check=True)
+    
     def ensure_network(self):
         """Create the Docker network."""
         self.docker_client.networks.create(self.network_name, driver="bridge")
@@ -159,6 +283,36 @@ class AgentSandbox:
         
         return proxy_container
     
+    def prepare_environment(self, on_step_done=None):
+        """Prepare images, workspace, volume, network and proxy, running independent steps concurrently.
+        
+        The proxy is started once both its image and the network exist. Returns the workspace path.
+        """
+        def step(func):
+            result = func()
+            if on_step_done:
+                on_step_done()
+            return result
+        
+        def prepare_workspace():
+            workspace_path = self.create_workspace_copy()
+            self.setup_claude_settings(workspace_path)
+            self.snapshot_workspace(workspace_path)
+            return workspace_path
+        
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            images_future = executor.submit(step, self.build_images)
+            network_future = executor.submit(step, self.ensure_network)
+            volume_future = executor.submit(step, self.create_credentials_volume)
+            workspace_future = executor.submit(step, prepare_workspace)
+            
+            images_future.result()
+            network_future.result()
+            step(self.start_proxy_container)
+            
+            volume_future.result()
+            return workspace_future.result()
+    
     def run_container(self, workspace_path, command=None, interactive=True):
         """Run a container with optional command and interactive mode."""
         # Build command to run container
@@ -207,16 +361,30 @@ class AgentSandbox:
     def generate_diff(self, workspace_path):
         """Generate diff between original and modified workspace."""
         
+        # Nothing written since the baseline snapshot means there is nothing to diff
+        if self.baseline_time_ns is not None and not self.workspace_modified(workspace_path):
+            return None
+        
         # Create diff file
         diff_file = self.cwd / f"sandbox-diff-{self.sandbox_name}.patch"
         
+        # Compare against the baseline snapshot if one was taken, otherwise against HEAD
+        if self.baseline_tree:
+            env = self.baseline_git_env()
+            diff_base = [self.baseline_tree]
+        else:
+            env = None
+            diff_base = []
+        
         # Add all changes to the index (respecting .gitignore)
-        subprocess.run(["git", "add", "-A"], cwd=str(workspace_path), capture_output=True)
+        subprocess.run(["git", "add", "-A"], cwd=str(workspace_path), env=env,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
         
         # Generate diff and write directly to file
         with open(diff_file, 'w') as f:
-            result = subprocess.run(["git", "diff", "--cached"], 
+            result = subprocess.run(["git", "diff", "--cached", "--binary", "--no-color", "--no-ext-diff", *diff_base], 
                                   cwd=str(workspace_path), 
+                                  env=env,
                                   stdout=f)
         
         # Check if diff file has content
@@ -244,8 +412,11 @@ class AgentSandbox:
     
     def cleanup_workspace(self):
         """Remove temporary workspace."""
-        if self.temp_workspace and self.temp_workspace.exists():
-            shutil.rmtree(self.temp_workspace)
+        if self.temp_workspace:
+            try:
+                shutil.rmtree(self.temp_workspace)
+            except FileNotFoundError:
+                pass
     
     def cleanup(self):
         """Clean up all resources."""
@@ -269,26 +440,9 @@ class AgentSandbox:
             startup_task = progress.add_task("Starting agent sandbox...", total=5)
             
             try:
-                # Build images if needed
-                progress.update(startup_task, description="Building Docker images...", completed=0)
-                self.build_images()
-                
-                # Create workspace copy
-                progress.update(startup_task, description="Creating workspace copy...", completed=1)
-                workspace_path = self.create_workspace_copy()
-                
-                # Setup Claude settings
-                progress.update(startup_task, description="Setting up Claude configuration...", completed=2)
-                self.setup_claude_settings(workspace_path)
-                
-                # Create persistent volume for Claude Code credentials
-                progress.update(startup_task, description="Creating credentials volume...", completed=3)
-                subprocess.run(["docker", "volume", "create", "claude-code-credentials"], check=True)
-                
-                # Ensure network and start proxy
-                progress.update(startup_task, description="Creating network and proxy...", completed=4)
-                self.ensure_network()
-                self.start_proxy_container()
+                # Build images, copy workspace and start network and proxy
+                progress.update(startup_task, description="Preparing sandbox...", completed=0)
+                workspace_path = self.prepare_environment(lambda: progress.advance(startup_task))
                 
                 # Log additional domains if any
                 if self.allowed_domains: